@@ -1,178 +1,272 @@
 import csv
+import functools
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 
 def parse_csv(file_path):
     """Parse the NTM definition from a CSV file."""
     with open(file_path, 'r') as file:
         reader = csv.reader(file)
         name = next(reader)[0]                  # Name of machine
-        states = next(reader)[0].split(',')     # List of our States
+        # State and symbol names form a small fixed set that recurs in every
+        # configuration; interning them makes later comparisons and hashing
+        # on them pointer checks
+        states = [sys.intern(s) for s in next(reader)[0].split(',')]   # List of our States
         sigma = next(reader)[0].split(',')      # The input alphabet
         gamma = next(reader)[0].split(',')      # Tape alphabet
-        start_state = next(reader)[0]
-        accept_state = next(reader)[0]
-        reject_state = next(reader)[0]
-        
-        # Read the transition rules
-        transitions = []
-        for row in reader:
-            if row:
-                transitions.append(tuple(row))
-        
+        start_state = sys.intern(next(reader)[0])
+        accept_state = sys.intern(next(reader)[0])
+        reject_state = sys.intern(next(reader)[0])
+
+        # Read the transition rules in one pass over the remaining rows
+        transitions = [tuple(sys.intern(field) for field in row) for row in reader if row]
+
+
     return name, states, sigma, gamma, start_state, accept_state, reject_state, transitions
 
 
-def simulate_ntm(file_path, input_string, max_depth=20, output_file="trace_output.txt"):
-    """Simulate the NTM on the given input and write trace to a file."""
+@functools.lru_cache(maxsize=None)
+def _load_machine(file_path, mtime):
+    """Parse a machine and build its transition index, cached per file version."""
     name, states, sigma, gamma, start_state, accept_state, reject_state, transitions = parse_csv(file_path)
-    
-    # Prepare output file
-    with open(output_file, 'w') as file:
-        file.write(f"Machine: {name}\n")
-        file.write(f"Input String: {input_string}\n\n")
-    
-    print(f"Machine: {name}")
-    print(f"Input String: {input_string}")
-
-    # Init configurations: a list of (left, current state, right)
-    configurations = [[("", start_state, input_string)]]
+
+    # Index transitions by (state, head) so each configuration needs one
+    # dict lookup instead of a scan over the whole transition list. Each
+    # entry pre-sorts the transitions into (right, left, stay) groups so
+    # the expansion loop never compares move strings
+    trans_by_key = defaultdict(lambda: ([], [], []))
+    move_group = {"R": 0, "L": 1, "S": 2}
+    for t_state, t_head, t_new_state, t_write, t_move in transitions:
+        trans_by_key[(t_state, t_head)][move_group[t_move]].append((t_new_state, t_write))
+
+    return name, start_state, accept_state, reject_state, dict(trans_by_key)
+
+
+def load_machine(file_path):
+    """Load a machine definition, reusing the parsed form while the file is unchanged."""
+    return _load_machine(file_path, os.path.getmtime(file_path))
+
+
+# Cache of (left, right) tape pairs so branches with identical tape content
+# share one tuple pair instead of each holding its own copy
+_tape_cache = {}
+
+
+def intern_tape(left, right):
+    """Return a shared (left, right) pair, caching the first one seen."""
+    key = (left, right)
+    cached = _tape_cache.get(key)
+    if cached is None:
+        # Intern the halves so equality and hashing on them later in the
+        # dedup set is a pointer check rather than a character compare
+        key = (sys.intern(left), sys.intern(right))
+        _tape_cache[key] = key
+        cached = key
+    return cached
+
+
+def simulate_ntm(file_path, input_string, max_depth=20, output_file="trace_output.txt", echo=True):
+    """Simulate the NTM on the given input and write trace to a file.
+
+    With echo=False the trace goes only to the file, so runs in parallel
+    worker processes don't interleave their output on the console.
+    """
+    name, start_state, accept_state, reject_state, trans_by_key = load_machine(file_path)
+
+    # Open the output file once for the whole run; every writer below
+    # shares this handle instead of reopening the file per message
+    with open(output_file, 'w') as out:
+        _simulate_ntm(name, start_state, accept_state, reject_state, trans_by_key,
+                      input_string, max_depth, out, echo)
+
+
+def _simulate_ntm(name, start_state, accept_state, reject_state, trans_by_key,
+                  input_string, max_depth, out, echo=True):
+    """Run the simulation, writing the trace to the open file handle `out`."""
+
+    def emit(text):
+        """Send a chunk of trace output to the file, and the console if echoing."""
+        if echo:
+            print(text, end="")
+        out.write(text)
+
+    def emit_lines(lines):
+        """Stream trace lines to the file, and the console if echoing, as
+        produced, so a wide depth never has to be materialized as one string."""
+        if echo:
+            write_console = sys.stdout.write
+            write_file = out.write
+            for line in lines:
+                write_console(line)
+                write_file(line)
+        else:
+            out.writelines(lines)
+
+    emit(f"Machine: {name}\n")
+    emit(f"Input String: {input_string}\n\n")
+
+    # Init configurations: a list of (left tape, current state, head symbol, right tape).
+    # The tapes are strings used as two stacks around the head: a move
+    # pushes/pops one symbol at the end facing the head. Strings keep each
+    # tape half in one compact allocation and cache their hash, which the
+    # dedup set and tape cache lean on.
+    initial = ("", start_state, input_string[0] if input_string else "_", input_string[1:])
+    # Only the current frontier is kept in memory; each depth's section of
+    # the trace is streamed out as soon as the depth is reached, so memory
+    # stays linear in the frontier size instead of growing with the whole tree
+    frontier = [initial]
+    _tape_cache.clear()  # Start each run with a fresh tape cache
     transition_count = 0  # Initialize transition count
     non_leaf_count = 0  # Initialize non-leaf count
 
-    # Create a set of explicitly defined (state, head) pairs
-    explicit_transitions = {(t[0], t[1]) for t in transitions}
+    # The expansion loop below is pure interpreter work, so bind the
+    # lookups it repeats every step to local names once up front
+    lookup_transitions = trans_by_key.get
+    share_tape = intern_tape
 
+    emit("Trace:\n")
     for depth in range(max_depth):
-        new_configurations = []
-        for config in configurations[-1]:
-            left, state, right = config
+        emit_lines(_iter_depth_lines(depth, frontier))
+        new_frontier = []
+        seen = set()  # Configurations already generated at this depth
+        save_config = new_frontier.append
+        mark_seen = seen.add
+        for config in frontier:
+            left, state, head, right = config
 
             if state == accept_state:
-                # Prepare accept message
-                msg = (
+                emit(
                     f"Depth of Tree of configurations: {depth}\n"
                     f"Accepted in {depth} transitions.\n\n"
                 )
-                # Print and write to file
-                print(msg)
-                write_to_file(output_file, msg)
-                print_trace(configurations, transition_count, non_leaf_count, output_file)
+                emit(_format_totals(transition_count, non_leaf_count))
                 return
             if state == reject_state:
                 transition_count += 1  # Count transitions leading to a reject state
                 continue  # Skip rejected branches
 
-            head = right[0] if right else "_"  # Read the current symbol (default to blank)
-            branch_has_transitions = False  # Track if this config has outgoing transitions
-
-            # Check for explicit transitions for this (state, head)
-            for t in transitions:
-                t_state, t_head, t_new_state, t_write, t_move = t
-                if t_state == state and t_head == head:
-                    branch_has_transitions = True  # Mark this as a non-leaf node
-                    if t_move == "R":  # Move right
-                        new_left = left + t_write  # Append current head symbol to left tape
-                        new_right = right[1:] if len(right) > 1 else "_"  # Remove first character from right
-                    elif t_move == "L":  # Move left
-                        # Apply write operation to the current head position
-                        new_right = t_write + (right[1:] if len(right) > 1 else "")
-                        if len(left) > 0:
-                            new_left = left[:-1]  # Remove last character of left
-                            new_right = left[-1] + new_right  # Prepend last character of left to right
-                        else:
-                            new_left = ""  # If left is empty, keep it empty
-                    else:  # Stay in place
-                        new_left = left
-                        new_right = t_write + (right[1:] if len(right) > 1 else "")  # Update first symbol of right
-
-                    # Save new configuration for the next depth
-                    new_configurations.append((new_left, t_new_state, new_right))
-                    transition_count += 1  # Increment transition count
+            # Look up the explicit transitions for this (state, head)
+            applicable = lookup_transitions((state, head))
+            if applicable:
+                right_moves, left_moves, stay_moves = applicable
+                successors = []
+                add_successor = successors.append
+                for t_new_state, t_write in right_moves:  # Move right
+                    # Push written symbol onto left tape, read next symbol
+                    # from right tape (default to blank)
+                    add_successor((left + t_write, t_new_state,
+                                   right[0] if right else "_", right[1:]))
+                for t_new_state, t_write in left_moves:  # Move left
+                    if left:
+                        # Pop last symbol of left tape, push written symbol
+                        # onto right tape
+                        add_successor((left[:-1], t_new_state,
+                                       left[-1], t_write + right))
+                    else:
+                        # At the left end of the tape the head stays put
+                        add_successor((left, t_new_state, t_write, right))
+                for t_new_state, t_write in stay_moves:  # Stay in place
+                    add_successor((left, t_new_state, t_write, right))
+
+                for new_left, t_new_state, new_head, new_right in successors:
+                    # Save new configuration for the next depth, sharing
+                    # tape storage with any sibling that has the same tapes.
+                    # Different paths can converge on the same configuration;
+                    # expanding it once is enough, so duplicates are dropped.
+                    new_left, new_right = share_tape(new_left, new_right)
+                    new_config = (new_left, t_new_state, new_head, new_right)
 
-            # Handle implicit transitions to the reject state
-            if (state, head) not in explicit_transitions:
-                transition_count += 1  # Count the implicit transition to the reject state
-                branch_has_transitions = True  # Implicit reject transitions also count for non-leaf determination
+                    # Accept as soon as the accepting configuration is created,
+                    # rather than expanding a whole extra depth first
+                    if t_new_state == accept_state:
+                        emit_lines(_iter_depth_lines(depth + 1, [new_config]))
+                        emit(
+                            f"Depth of Tree of configurations: {depth + 1}\n"
+                            f"Accepted in {depth + 1} transitions.\n\n"
+                        )
+                        emit(_format_totals(transition_count + 1, non_leaf_count + 1))
+                        return
 
-            # Increment non-leaf count if there are outgoing transitions
-            if branch_has_transitions:
+                    if new_config in seen:
+                        continue
+                    mark_seen(new_config)
+                    save_config(new_config)
+                    transition_count += 1  # Increment transition count
+                non_leaf_count += 1
+            else:
+                # Implicit transition to the reject state
+                transition_count += 1
                 non_leaf_count += 1
 
         # If no new configurations generated, halt machine w/o accepting
-        if not new_configurations:
-            msg = (
+        if not new_frontier:
+            emit(
                 f"Rejected in {depth} transitions.\n"
                 f"Depth of Tree of configurations: {depth}\n\n"
             )
-            # Print and write to file
-            print(msg)
-            write_to_file(output_file, msg)
-            print_trace(configurations, transition_count, non_leaf_count, output_file)
+            emit(_format_totals(transition_count, non_leaf_count))
             return
 
-        configurations.append(new_configurations)
+        frontier = new_frontier  # Previous frontier is no longer needed
 
-    print("Max depth reached. Halting simulation.")
-    write_trace(configurations, transition_count, non_leaf_count, output_file)
+    if echo:
+        print("Max depth reached. Halting simulation.")
+    emit_lines(_iter_depth_lines(max_depth, frontier))
+    emit(_format_totals(transition_count, non_leaf_count))
 
 
-def write_trace(configurations, transition_count, non_leaf_count, output_file):
-    """Write the trace of configurations to a file."""
-    trace_output = "Trace:\n"
-    for depth, configs in enumerate(configurations):
-        trace_output += f"Depth {depth}:\n"
-        for config in configs:
-            trace_output += f"  {config}\n"
-    trace_output += f"Total transitions: {transition_count}\n"
-    trace_output += f"Total non-leaf nodes: {non_leaf_count}\n"
-    if non_leaf_count > 0:
-        nondeterminism = transition_count / non_leaf_count
-        trace_output += f"Nondeterminism: {nondeterminism:.2f}\n"
-    else:
-        trace_output += "Nondeterminism: Undefined (no non-leaf nodes)\n"
-    trace_output += "==============================================\n"
-
-    print(trace_output)  # Ensure the trace is printed to the console
-    write_to_file(output_file, trace_output)
+def format_config(config):
+    """Convert a (left, state, head, right) configuration back to the
+    (left string, state, right string) display form used in the trace."""
+    left, state, head, right = config
+    return (left, state, head + right)
 
 
-def write_to_file(output_file, content):
-    """Write content to the specified output file."""
-    with open(output_file, 'a') as file:
-        file.write(content)
+def _iter_depth_lines(depth, configs):
+    """Yield the trace lines for one depth of the configuration tree, one
+    at a time, so emitting a depth never builds its whole section in memory."""
+    yield f"Depth {depth}:\n"
+    for config in configs:
+        yield f"  {format_config(config)}\n"
 
 
-def print_trace(configurations, transition_count, non_leaf_count, output_file=None):
-    """Print the trace of configurations, total transitions, and nondeterminism."""
-    trace_output = "Trace:\n"
-    for depth, configs in enumerate(configurations):
-        trace_output += f"Depth {depth}:\n"
-        for config in configs:
-            trace_output += f"  {config}\n"
-    trace_output += f"Total transitions: {transition_count}\n"
-    trace_output += f"Total non-leaf nodes: {non_leaf_count}\n"
+def _format_totals(transition_count, non_leaf_count):
+    """Build the closing totals and nondeterminism summary of a trace."""
+    parts = [f"Total transitions: {transition_count}\n"]
+    parts.append(f"Total non-leaf nodes: {non_leaf_count}\n")
     if non_leaf_count > 0:
         nondeterminism = transition_count / non_leaf_count
-        trace_output += f"Nondeterminism: {nondeterminism:.2f}\n"
+        parts.append(f"Nondeterminism: {nondeterminism:.2f}\n")
     else:
-        trace_output += "Nondeterminism: Undefined (no non-leaf nodes)\n"
-    trace_output += "==============================================\n"
+        parts.append("Nondeterminism: Undefined (no non-leaf nodes)\n")
+    parts.append("==============================================\n")
+    return "".join(parts)
 
-    print(trace_output)
-    if output_file:
-        write_to_file(output_file, trace_output)
 
-
-if __name__ == "__main__":
-    simulate_ntm("check_a_plus_spickfor.csv", "aaa", output_file="output_a_plus_spickfor.txt")
+def _run_job(job):
+    """Run one quiet simulation from a (machine file, input, output file) tuple."""
+    machine_file, input_string, output_file = job
+    simulate_ntm(machine_file, input_string, output_file=output_file, echo=False)
+    return output_file
 
 
-    simulate_ntm("check_a_plus_DTM_spickfor.csv","aaa", output_file= "output_a_plus_DTM_spickfor.txt")
-    simulate_ntm("check_palindrome_DTM_spickfor.csv","aaabbbaaa", output_file="output_palindrome_DTM_spickfor.txt")
-    simulate_ntm("check_palindrome_spickfor.csv","aaabbbaaa", output_file="output_palindrome_spickfor.txt")
-    # simulate_ntm("check_palindrome_spickfor.csv","abbaabbaabbaabba", output_file="output_palindrome_spickfor.txt")
-    simulate_ntm("check_2x0_DTM_spickfor.csv","000011", output_file="output_2x0_DTM_spickfor.txt")
-
+if __name__ == "__main__":
+    jobs = [
+        ("check_a_plus_spickfor.csv", "aaa", "output_a_plus_spickfor.txt"),
+        ("check_a_plus_DTM_spickfor.csv", "aaa", "output_a_plus_DTM_spickfor.txt"),
+        ("check_palindrome_DTM_spickfor.csv", "aaabbbaaa", "output_palindrome_DTM_spickfor.txt"),
+        ("check_palindrome_spickfor.csv", "aaabbbaaa", "output_palindrome_spickfor.txt"),
+        # ("check_palindrome_spickfor.csv", "abbaabbaabbaabba", "output_palindrome_spickfor.txt"),
+        ("check_2x0_DTM_spickfor.csv", "000011", "output_2x0_DTM_spickfor.txt"),
+        # ("check_abc_star_spickfor.csv", "abc", "output_abc_star_spickfor.txt"),
+        ("check_abc_star_spickfor.csv", "abbbcccccc", "output_abc_star_spickfor.txt"),
+        # ("check_abc_star_spickfor.csv", "acb", "output_abc_star_spickfor.txt"),
+    ]
 
-    # simulate_ntm("check_abc_star_spickfor.csv", "abc", output_file="output_abc_star_spickfor.txt")
-    simulate_ntm("check_abc_star_spickfor.csv", "abbbcccccc", output_file="output_abc_star_spickfor.txt")
-    # simulate_ntm("check_abc_star_spickfor.csv", "acb", output_file="output_abc_star_spickfor.txt")
+    # The runs are independent and CPU-bound, so fan them out across cores;
+    # each writes only to its own output file to keep the traces readable
+    with ProcessPoolExecutor() as executor:
+        for finished in executor.map(_run_job, jobs):
+            print(f"Finished {finished}")